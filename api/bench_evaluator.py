@@ -0,0 +1,61 @@
+"""
+positions per second scored by the evaluator, by batch size.
+
+    python bench_evaluator.py --weights weights.npz
+"""
+
+import argparse
+import random
+import time
+from game import Game, Rules
+from evaluator import Evaluator
+from monte_carlo_ai import copy_boards, get_winner
+
+
+def random_positions(count: int, seed: int):
+    rng = random.Random(seed)
+    positions, players = [], []
+    boards, player = copy_boards(Game().boards), 1
+
+    while len(positions) < count:
+        positions.append(copy_boards(boards))
+        players.append(player)
+
+        moves = Rules.get_legal_moves(boards, player)
+        if moves:
+            Rules.update_boards(boards, rng.choice(moves), player)
+            player = Rules.get_opponent_number(player)
+        if not moves or get_winner(boards) is not None:
+            boards, player = copy_boards(Game().boards), 1
+
+    return positions, players
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--weights", help="defaults to untrained weights")
+    parser.add_argument("--positions", type=int, default=4096)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 64, 512])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    evaluator = (
+        Evaluator.load(args.weights) if args.weights else Evaluator.random(seed=0)
+    )
+    positions, players = random_positions(args.positions, args.seed)
+
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        for index in range(0, len(positions), batch_size):
+            evaluator.evaluate(
+                positions[index : index + batch_size],
+                players[index : index + batch_size],
+            )
+        elapsed = time.perf_counter() - start
+        print(
+            f"batch size {batch_size:>4}: {len(positions) / elapsed:>10,.0f} positions/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+cold start time of the API: each run is a fresh interpreter that imports
+index, serves its first request, then its first AI reply.
+
+    python bench_startup.py --runs 20
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# the AI reply uses a short clock, so it times starting the scheduler and a
+# search rather than the think time
+COLD_START = """
+import time
+start = time.perf_counter()
+import index
+imported = time.perf_counter()
+client = index.app.test_client()
+client.post("/api/games", json={})
+served = time.perf_counter()
+client.post("/api/games", json={"ai_color": "black", "clock": 1.0})
+replied = time.perf_counter()
+print(imported - start, served - start, replied - served)
+"""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    import_times, first_response_times, ai_reply_times = [], [], []
+    for _ in range(args.runs):
+        output = subprocess.run(
+            [sys.executable, "-c", COLD_START],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout
+        import_time, first_response_time, ai_reply_time = map(float, output.split())
+        import_times.append(import_time)
+        first_response_times.append(first_response_time)
+        ai_reply_times.append(ai_reply_time)
+
+    for label, times in (
+        ("import index", import_times),
+        ("first response", first_response_times),
+        ("first AI reply", ai_reply_times),
+    ):
+        print(
+            f"{label:>14}: median {statistics.median(times) * 1000:7.1f} ms, "
+            f"max {max(times) * 1000:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import numpy as np
+from typing import Optional, Sequence
+from game_types import BoardsType, PlayerNumberType
+
+# own stones, opponent stones, then per-board stone counts for each side
+FEATURE_SIZE = 2 * 64 + 2 * 4
+
+
+def encode_stones(boards_batch: Sequence[BoardsType]) -> np.ndarray:
+    """(N, 4, 16) int8 array of stones, 0 for empty squares"""
+    return np.array(
+        [
+            [[stone or 0 for stone in board] for board in boards]
+            for boards in boards_batch
+        ],
+        dtype=np.int8,
+    ).reshape(-1, 4, 16)
+
+
+def encode_features(stones: np.ndarray, players: np.ndarray) -> np.ndarray:
+    """features of each position, seen by the player to move"""
+    stones = stones.copy()
+    # rotate white's positions half a turn so both sides see their home boards
+    # and stones in the same places
+    flip = players == 2
+    stones[flip] = stones[flip][:, ::-1, ::-1]
+
+    own = stones == players[:, None, None]
+    opponent = (stones != 0) & ~own
+
+    return np.concatenate(
+        (
+            own.reshape(-1, 64),
+            opponent.reshape(-1, 64),
+            own.sum(axis=2) / 4,
+            opponent.sum(axis=2) / 4,
+        ),
+        axis=1,
+    ).astype(np.float32)
+
+
+class Evaluator:
+    """
+    one hidden layer MLP scoring positions for the player to move.
+    weights come from train_evaluator.py
+    """
+
+    def __init__(
+        self, w1: np.ndarray, b1: np.ndarray, w2: np.ndarray, b2: np.ndarray
+    ) -> None:
+        self.w1 = w1.astype(np.float32)
+        self.b1 = b1.astype(np.float32)
+        self.w2 = w2.astype(np.float32)
+        self.b2 = b2.astype(np.float32)
+
+    @classmethod
+    def random(cls, hidden_size: int = 32, seed: Optional[int] = None) -> "Evaluator":
+        rng = np.random.default_rng(seed)
+        return cls(
+            w1=rng.normal(0, np.sqrt(2 / FEATURE_SIZE), (FEATURE_SIZE, hidden_size)),
+            b1=np.zeros(hidden_size),
+            w2=rng.normal(0, np.sqrt(1 / hidden_size), hidden_size),
+            b2=np.zeros(1),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "Evaluator":
+        with np.load(path) as weights:
+            return cls(weights["w1"], weights["b1"], weights["w2"], weights["b2"])
+
+    def save(self, path: str) -> None:
+        np.savez(path, w1=self.w1, b1=self.b1, w2=self.w2, b2=self.b2)
+
+    def forward(self, features: np.ndarray) -> np.ndarray:
+        """win probabilities from encoded features"""
+        hidden = np.maximum(features @ self.w1 + self.b1, 0)
+        logits = hidden @ self.w2 + self.b2
+        return 1 / (1 + np.exp(-logits))
+
+    def evaluate(
+        self, boards_batch: Sequence[BoardsType], players: Sequence[PlayerNumberType]
+    ) -> np.ndarray:
+        """probability that the player to move wins, for each position"""
+        features = encode_features(
+            encode_stones(boards_batch), np.asarray(players, dtype=np.int8)
+        )
+        return self.forward(features)
@@ -1,7 +1,6 @@
-import numpy as np
 import re
 from dataclasses import dataclass
-from typing import Optional, Literal, NamedTuple
+from typing import TYPE_CHECKING, List, Optional, Literal, NamedTuple
 from game_types import (
     PlayerColorType,
     PlayerNumberType,
@@ -14,7 +13,8 @@ from game_types import (
     BoardsType,
 )
 
-from monte_carlo_ai import MonteCarloAI
+if TYPE_CHECKING:
+    from monte_carlo_ai import MonteCarloAI
 
 
 LETTER_TO_INDEX = {"a": 0, "b": 1, "c": 2, "d": 3}
@@ -23,6 +23,22 @@ INDEX_TO_LETTER = {v: k for k, v in LETTER_TO_INDEX.items()}
 CARDINAL_TO_INDEX = {"n": 0, "ne": 1, "e": 2, "se": 3, "s": 4, "sw": 5, "w": 6, "nw": 7}
 INDEX_TO_CARDINAL = {v: k for k, v in CARDINAL_TO_INDEX.items()}
 
+MOVE_REGEX = re.compile(
+    r"""
+        ^
+        ([a-d])
+        (\d{1,2})
+        (n|nw|w|sw|s|se|e|ne)
+        ([1-2])
+        [,\s]+
+        ([a-d])
+        (\d{1,2})
+        .*
+        $
+    """,
+    re.VERBOSE | re.IGNORECASE,
+)
+
 
 def board_letter_to_index(letter: BoardLetterType) -> BoardNumberType:
     return LETTER_TO_INDEX[letter.lower()]  # type: ignore
@@ -137,11 +153,13 @@ class GameError(Exception):
 
 class Game:
     ### initialization and UI functions
-    def __init__(self) -> None:
+    def __init__(self, ai: Optional["MonteCarloAI"] = None) -> None:
         self._boards: BoardsType = []
         self.initialize_boards()
         self._player_turn: PlayerNumberType = 1
         self._winner: Optional[PlayerNumberType] = None
+        # every move played is forwarded to the AI so it can reuse its search tree
+        self._ai = ai
 
     @property
     def boards(self) -> BoardsType:
@@ -165,6 +183,9 @@ class Game:
 
     @staticmethod
     def print_boards(boards) -> None:
+        # numpy is only needed here, so importing game doesn't pay for it
+        import numpy as np
+
         value_to_symbol = {
             None: ".",
             1: "X",
@@ -221,9 +242,11 @@ class Game:
         self.check_win()
         if self._winner is not None:
             print(f"{player_number_to_color(self._winner)} is the winner")
-            return None
+        else:
+            self.change_turn()
 
-        self.change_turn()
+        if self._ai is not None:
+            self._ai.observe_move(move, self._boards, self._player_turn)
 
         return None
 
@@ -281,22 +304,17 @@ class Game:
 
         return move
 
+    @staticmethod
+    def format_move(move: Move) -> str:
+        # the notation parse_move reads, e.g. "a1s1 c1"
+        return (
+            f"{index_to_board_letter(move.passive.board)}{move.passive.origin + 1}"
+            f"{index_to_cardinal(move.direction.cardinal)}{move.direction.length} "
+            f"{index_to_board_letter(move.active.board)}{move.active.origin + 1}"
+        )
+
     def process_user_command(self, command: str) -> Literal[True, None]:
-        move_pattern = r"""
-            ^                         
-            ([a-d])               
-            (\d{1,2})               
-            (n|nw|w|sw|s|se|e|ne)     
-            ([1-2])
-            [,\s]+               
-            ([a-d])          
-            (\d{1,2})          
-            .*                
-            $                         
-        """
-
-        move_regex = re.compile(move_pattern, re.VERBOSE | re.IGNORECASE)
-        match = move_regex.match(command)
+        match = MOVE_REGEX.match(command)
 
         if command == "quit" or command == "q" or command == ":q":
             print("exiting...")
@@ -309,6 +327,8 @@ class Game:
             self.initialize_boards()
             self._winner = None
             self._player_turn = 1
+            if self._ai is not None:
+                self._ai.reset()
             return None
         # move syntax match
         elif match:
@@ -338,6 +358,75 @@ class Game:
 
 
 class Rules:
+    @staticmethod
+    def get_legal_moves(boards: BoardsType, player: PlayerNumberType) -> List[Move]:
+        home_boards = (0, 1) if player == 1 else (2, 3)
+        stones = [
+            [index for index, stone in enumerate(board) if stone == player]
+            for board in boards
+        ]
+        moves = []
+
+        for passive_board in home_boards:
+            # active board is any board of the opposite color
+            active_boards = [
+                board
+                for board in range(4)
+                if board != passive_board and board + passive_board != 3
+            ]
+            for passive_origin in stones[passive_board]:
+                for cardinal in range(8):
+                    for length in (1, 2):
+                        passive_destination = Rules.get_move_destination(
+                            passive_origin, cardinal, length  # type: ignore
+                        )
+                        if passive_destination is None:
+                            continue
+
+                        direction = Direction(cardinal=cardinal, length=length)  # type: ignore
+                        passive = BoardMove(
+                            board=passive_board,  # type: ignore
+                            origin=passive_origin,  # type: ignore
+                            destination=passive_destination,
+                        )
+                        if not Rules.is_passive_legal(
+                            passive, direction, boards, player
+                        ).is_legal:
+                            continue
+
+                        for active_board in active_boards:
+                            for active_origin in stones[active_board]:
+                                active_destination = Rules.get_move_destination(
+                                    active_origin, cardinal, length  # type: ignore
+                                )
+                                if active_destination is None:
+                                    continue
+
+                                active = BoardMove(
+                                    board=active_board,  # type: ignore
+                                    origin=active_origin,  # type: ignore
+                                    destination=active_destination,
+                                    is_push=False,
+                                )
+                                if Rules.is_move_push(active, length, boards):  # type: ignore
+                                    active.is_push = True
+                                    active.push_destination = Rules.get_move_destination(
+                                        active_origin, cardinal, length + 1  # type: ignore
+                                    )
+
+                                if Rules.is_active_legal(
+                                    active, passive, direction, boards, player
+                                ).is_legal:
+                                    moves.append(
+                                        Move(
+                                            passive=passive,
+                                            active=active,
+                                            direction=direction,
+                                        )
+                                    )
+
+        return moves
+
     @staticmethod
     def is_move_legal(
         move: Move, boards: BoardsType, player: PlayerNumberType
@@ -532,8 +621,12 @@ class Rules:
 
 
 if __name__ == "__main__":
+    from monte_carlo_ai import MonteCarloAI
+
+    ai = MonteCarloAI(ponder=True)
+    # the AI only ponders once it's attached, so it stays detached while the
+    # AI turn below is disabled: use Game(ai=ai) when enabling it
     game = Game()
-    ai = MonteCarloAI()
 
     game.print_boards(game.boards)
     game.print_current_player()
@@ -542,7 +635,7 @@ if __name__ == "__main__":
     while True:
         # if game.player_turn == 2 and game.winner is None:
         #    print("AI's turn...")
-        #    move = ai.generate_move(game.boards, "white")
+        #    move = ai.generate_move(game.boards, 2)
         #    game.play_move(move)
 
         #    game.print_boards(game.boards)
@@ -1,6 +1,232 @@
-from flask import Flask
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Optional
+from flask import Flask, jsonify, request
+from game import Game, GameError, MOVE_REGEX, player_color_to_number
+from game_types import PlayerNumberType
+from monte_carlo_ai import MonteCarloAI
+from search_scheduler import SchedulerMetrics, SearchScheduler
+
 app = Flask(__name__)
 
+# every AI game shares these workers, so CPU use doesn't grow with the games
+SEARCH_WORKERS = 4
+
+# seconds the AI thinks per move when the client doesn't send its clock, and
+# the most it will think with a long clock
+DEFAULT_THINK_TIME = 2.0
+MAX_THINK_TIME = 10.0
+
+# each AI game preallocates its search tree, about 20 bytes a node
+AI_MAX_NODES = 20_000
+# games with no requests for this many seconds are dropped
+GAME_TIMEOUT = 30 * 60
+
+
+@dataclass
+class ActiveGame:
+    game: Game
+    ai: MonteCarloAI
+    ai_player: PlayerNumberType
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    last_active: float = field(default_factory=time.monotonic)
+
+
+games: Dict[str, ActiveGame] = {}
+games_lock = threading.Lock()
+
+_scheduler: Optional[SearchScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> SearchScheduler:
+    # workers start with the first request that needs them, not on cold start
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = SearchScheduler(workers=SEARCH_WORKERS)
+        return _scheduler
+
+
+def request_body() -> Optional[dict]:
+    # None when the body is JSON but not an object
+    body = request.get_json(silent=True)
+    if body is None:
+        return {}
+    return body if isinstance(body, dict) else None
+
+
+def parse_clock(body: dict) -> Optional[float]:
+    # clock is the AI's remaining time in seconds
+    clock = body.get("clock")
+    if clock is None:
+        return None
+    if isinstance(clock, bool) or not isinstance(clock, (int, float)) or not clock >= 0:
+        raise ValueError(f"clock must be a non-negative number, got {clock!r}")
+    return float(clock)
+
+
+def get_game(game_id: str) -> Optional[ActiveGame]:
+    with games_lock:
+        active = games.get(game_id)
+    if active is not None:
+        active.last_active = time.monotonic()
+    return active
+
+
+def expire_games() -> None:
+    cutoff = time.monotonic() - GAME_TIMEOUT
+    with games_lock:
+        for game_id in [
+            game_id for game_id, active in games.items() if active.last_active < cutoff
+        ]:
+            del games[game_id]
+
+
+def think_time(clock: Optional[float]) -> float:
+    if clock is None:
+        return DEFAULT_THINK_TIME
+    return min(MAX_THINK_TIME, clock / 20)
+
+
+def play_ai_move(active: ActiveGame, clock: Optional[float]) -> str:
+    game = active.game
+    future = get_scheduler().submit(
+        active.ai, game.boards, active.ai_player, think_time(clock)
+    )
+    move = future.result()
+    game.play_move(move)
+    return Game.format_move(move)
+
+
+def respond_with_ai_move(game_id: str, active: ActiveGame, clock: Optional[float]):
+    # called with active.lock held
+    try:
+        ai_move = play_ai_move(active, clock)
+    except Exception as e:
+        # the game stays on the AI's turn, so the reply can be retried
+        return jsonify(id=game_id, error=f"the AI couldn't move: {e}"), 500
+    return game_state(game_id, active, ai_move)
+
+
+def game_state(game_id: str, active: ActiveGame, ai_move: Optional[str] = None):
+    game = active.game
+    if game.winner is not None:
+        # finished games are dropped, along with their AI's search tree
+        with games_lock:
+            games.pop(game_id, None)
+
+    return jsonify(
+        id=game_id,
+        boards=game.boards,
+        player_turn=game.player_turn,
+        winner=game.winner,
+        ai_move=ai_move,
+    )
+
+
 @app.route("/api/baba")
 def hello_world():
     return "<p> you are the baba</p>"
+
+
+@app.route("/api/games", methods=["POST"])
+def create_game():
+    body = request_body()
+    if body is None:
+        return jsonify(error="request body must be a JSON object"), 400
+    ai_color = body.get("ai_color", "white")
+    if ai_color not in ("black", "white"):
+        return jsonify(error=f"ai_color must be black or white, got {ai_color}"), 400
+    try:
+        clock = parse_clock(body)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+    expire_games()
+    # API games don't ponder: a pondering thread per game would search
+    # outside the scheduler, and CPU use would grow with the number of games.
+    # the tree under the human's reply is still reused for the next search
+    ai = MonteCarloAI(max_nodes=AI_MAX_NODES)
+    active = ActiveGame(
+        game=Game(ai=ai), ai=ai, ai_player=player_color_to_number(ai_color)
+    )
+    game_id = uuid.uuid4().hex
+    with games_lock:
+        games[game_id] = active
+
+    with active.lock:
+        if active.ai_player == 1:
+            return respond_with_ai_move(game_id, active, clock)
+        return game_state(game_id, active)
+
+
+@app.route("/api/games/<game_id>/moves", methods=["POST"])
+def play_move(game_id: str):
+    active = get_game(game_id)
+    if active is None:
+        return jsonify(error=f"no game with id {game_id}"), 404
+
+    body = request_body()
+    if body is None:
+        return jsonify(error="request body must be a JSON object"), 400
+    match = MOVE_REGEX.match(str(body.get("move", "")))
+    if not match:
+        return jsonify(error=f"i don't understand move: {body.get('move')}"), 400
+    try:
+        clock = parse_clock(body)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+    with active.lock:
+        game = active.game
+        if game.winner is not None:
+            return jsonify(error="the game is over"), 400
+        if game.player_turn == active.ai_player:
+            return jsonify(error="it's the AI's turn, post to ai-move"), 400
+
+        try:
+            game.play_move(Game.parse_move(match))
+        except (GameError, ValueError) as e:
+            # BoardMove raises ValueError for squares outside the board
+            return jsonify(error=str(e)), 400
+
+        if game.winner is None:
+            return respond_with_ai_move(game_id, active, clock)
+        return game_state(game_id, active)
+
+
+@app.route("/api/games/<game_id>/ai-move", methods=["POST"])
+def retry_ai_move(game_id: str):
+    # asks again for an AI reply that failed
+    active = get_game(game_id)
+    if active is None:
+        return jsonify(error=f"no game with id {game_id}"), 404
+
+    body = request_body()
+    if body is None:
+        return jsonify(error="request body must be a JSON object"), 400
+    try:
+        clock = parse_clock(body)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+    with active.lock:
+        game = active.game
+        if game.winner is not None:
+            return jsonify(error="the game is over"), 400
+        if game.player_turn != active.ai_player:
+            return jsonify(error="it's your turn"), 400
+
+        return respond_with_ai_move(game_id, active, clock)
+
+
+@app.route("/api/scheduler")
+def scheduler_metrics():
+    # reading metrics shouldn't start the workers on a cold instance
+    with _scheduler_lock:
+        scheduler = _scheduler
+    metrics = scheduler.metrics() if scheduler is not None else SchedulerMetrics()
+    return jsonify(asdict(metrics))
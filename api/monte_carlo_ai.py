@@ -1,32 +1,481 @@
-from typing import List
+import math
+import random
+import threading
+from array import array
+from typing import TYPE_CHECKING, List, Optional, Tuple
+from game import BoardMove, Direction, GameError, Move, Rules
 from game_types import BoardsType, BoardType, PlayerNumberType, CoordinateType
 
+if TYPE_CHECKING:
+    from evaluator import Evaluator
 
-class MonteCarloAI:
-    def __init__(self):
-        pass
 
-    @staticmethod
-    def generate_move(boards: BoardsType, player: PlayerNumberType):
-        from game import Rules, Move, BoardMove, Direction
-
-        move = Move(
-            passive=BoardMove(
-                board=2, origin=15, destination=0
-            ),  # destination is placeholder
-            active=BoardMove(
-                board=3, origin=15, destination=0
-            ),  # destination is placeholder
-            direction=Direction(cardinal=0, length=1),
-        )
-        move.passive.destination = Rules.get_move_destination(
-            move.passive.origin, move.direction.cardinal, move.direction.length
+def copy_boards(boards: BoardsType) -> BoardsType:
+    return [board[:] for board in boards]
+
+
+def get_winner(boards: BoardsType) -> Optional[PlayerNumberType]:
+    # a move only ever removes the opponent's stones, so at most one side has won
+    for board in boards:
+        if 2 not in board:
+            return 1
+        if 1 not in board:
+            return 2
+    return None
+
+
+def pack_move(move: Move) -> int:
+    """
+    16 bit encoding of a move: passive board and origin, active board and
+    origin, cardinal, length. is_push and the destinations follow from these
+    """
+    return (
+        move.passive.board << 14
+        | move.passive.origin << 10
+        | move.active.board << 8
+        | move.active.origin << 4
+        | move.direction.cardinal << 1
+        | move.direction.length - 1
+    )
+
+
+def unpack_move(packed: int, boards: BoardsType) -> Move:
+    """the move encoded by `packed`, played on `boards`"""
+    cardinal = (packed >> 1) & 7
+    length = (packed & 1) + 1
+    passive_origin = (packed >> 10) & 15
+    active_origin = (packed >> 4) & 15
+
+    move = Move(
+        passive=BoardMove(
+            board=(packed >> 14) & 3,  # type: ignore
+            origin=passive_origin,  # type: ignore
+            destination=Rules.get_move_destination(passive_origin, cardinal, length),  # type: ignore
+        ),
+        active=BoardMove(
+            board=(packed >> 8) & 3,  # type: ignore
+            origin=active_origin,  # type: ignore
+            destination=Rules.get_move_destination(active_origin, cardinal, length),  # type: ignore
+            is_push=False,
+        ),
+        direction=Direction(cardinal=cardinal, length=length),  # type: ignore
+    )
+    if Rules.is_move_push(move.active, length, boards):  # type: ignore
+        move.active.is_push = True
+        move.active.push_destination = Rules.get_move_destination(
+            active_origin, cardinal, length + 1  # type: ignore
         )
-        move.active.destination = Rules.get_move_destination(
-            move.active.origin, move.direction.cardinal, move.direction.length
+
+    return move
+
+
+class NodePool:
+    """
+    search tree stored in preallocated parallel arrays, indexed by node.
+    the children of a node fill one contiguous block starting at first_child,
+    and node 0 is the root
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.visits = array("i", bytes(4 * capacity))
+        # scored for the player who played `move`
+        self.wins = array("d", bytes(8 * capacity))
+        self.first_child = array("i", [-1]) * capacity
+        self.child_count = array("H", bytes(2 * capacity))
+        # packed move that led to the node
+        self.move = array("H", bytes(2 * capacity))
+        self.size = 0
+
+    def clear(self) -> None:
+        self.size = 0
+
+    def allocate(self, count: int) -> int:
+        """index of `count` fresh nodes, or -1 if the pool is full"""
+        start = self.size
+        end = start + count
+        if end > self.capacity:
+            return -1
+
+        self.visits[start:end] = array("i", bytes(4 * count))
+        self.wins[start:end] = array("d", bytes(8 * count))
+        self.first_child[start:end] = array("i", [-1]) * count
+        self.child_count[start:end] = array("H", bytes(2 * count))
+        self.size = end
+        return start
+
+    def keep_subtree(self, root: int) -> None:
+        """make `root` node 0, and free every node outside its subtree"""
+        blocks = []
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            start = self.first_child[node]
+            if start != -1:
+                count = self.child_count[node]
+                blocks.append((start, count))
+                stack.extend(range(start, start + count))
+
+        # a block always sits after its parent's block, so compacting blocks in
+        # index order only ever copies nodes downwards, over freed ones
+        blocks.sort()
+        self._copy(root, 0, 1)
+        new_starts = {}
+        size = 1
+        for start, count in blocks:
+            self._copy(start, size, count)
+            new_starts[start] = size
+            size += count
+
+        first_child = self.first_child
+        for node in range(size):
+            if first_child[node] != -1:
+                first_child[node] = new_starts[first_child[node]]
+        self.size = size
+
+    def _copy(self, source: int, destination: int, count: int) -> None:
+        for values in (
+            self.visits,
+            self.wins,
+            self.first_child,
+            self.child_count,
+            self.move,
+        ):
+            values[destination : destination + count] = values[source : source + count]
+
+
+class MonteCarloAI:
+    def __init__(
+        self,
+        # enough to visit all 232 opening moves at least once, with short
+        # rollouts so a move still takes a few seconds
+        iterations: int = 500,
+        max_nodes: int = 100_000,
+        rollout_depth: int = 10,
+        exploration: float = math.sqrt(2),
+        ponder: bool = False,
+        evaluator: Optional["Evaluator"] = None,
+        batch_size: int = 8,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.iterations = iterations
+        # with an evaluator, rollouts can be shortened or skipped (depth 0)
+        self.rollout_depth = rollout_depth
+        self.exploration = exploration
+        self.ponder = ponder
+        self.evaluator = evaluator
+        self.batch_size = batch_size
+        self._rng = random.Random(seed)
+
+        # max_nodes is a hard cap: the pool never grows past it
+        self._pool = NodePool(max_nodes)
+        self._root_boards: BoardsType = []
+        self._root_player: PlayerNumberType = 1
+        # set when a leaf couldn't be expanded, and cleared when nodes are freed
+        self._tree_full = False
+
+        # the tree is only touched by one thread at a time: every public method
+        # stops the ponder thread before reading or changing it
+        self._ponder_thread: Optional[threading.Thread] = None
+        self._stop_pondering = threading.Event()
+
+    @property
+    def max_nodes(self) -> int:
+        return self._pool.capacity
+
+    @property
+    def node_count(self) -> int:
+        return self._pool.size
+
+    @property
+    def root_visits(self) -> int:
+        return self._pool.visits[0] if self._pool.size else 0
+
+    @property
+    def root_expanded(self) -> bool:
+        return bool(self._pool.size) and self._pool.first_child[0] != -1
+
+    ### public interface
+    def generate_move(self, boards: BoardsType, player: PlayerNumberType) -> Move:
+        self.begin_search(boards, player)
+        self.search(self.iterations)
+        return self.finish_search()
+
+    def begin_search(self, boards: BoardsType, player: PlayerNumberType) -> None:
+        """
+        start searching for `player`'s move on `boards`, reusing the tree if it
+        is already rooted there. generate_move is begin_search, search and
+        finish_search in one call, for callers that don't slice the search up
+        """
+        self.stop_pondering()
+
+        if (
+            not self._pool.size
+            or self._root_player != player
+            or self._root_boards != boards
+        ):
+            self._set_root(boards, player)
+
+    def search(self, iterations: int) -> None:
+        remaining = iterations
+        while remaining > 0:
+            batch_size = min(self.batch_size, remaining)
+            self._iterate(batch_size)
+            remaining -= batch_size
+
+    def finish_search(self) -> Move:
+        """play the most visited move in the tree, and ponder on the reply"""
+        pool = self._pool
+        start = pool.first_child[0]
+        if start == -1:
+            # the root was never expanded, so pick any legal move
+            return self._play_random_move()
+
+        # ties on visits are common when the budget barely covers the root's
+        # moves, so they go to the better scoring move
+        best = max(
+            range(start, start + pool.child_count[0]),
+            key=lambda child: (
+                pool.visits[child],
+                pool.wins[child] / pool.visits[child] if pool.visits[child] else 0.0,
+            ),
         )
+        move = unpack_move(pool.move[best], self._root_boards)
+        self._promote(best)
+        self.start_pondering()
+
+        return move
+
+    def observe_move(
+        self, move: Move, boards: BoardsType, player: PlayerNumberType
+    ) -> None:
+        """keep the subtree under `move`, now that it's been played on `boards`"""
+        self.stop_pondering()
+
+        if get_winner(boards) is not None:
+            self.reset()
+            return
+
+        pool = self._pool
+        if pool.size and not (
+            self._root_player == player and self._root_boards == boards
+        ):
+            packed = pack_move(move)
+            start = pool.first_child[0]
+            child = next(
+                (
+                    child
+                    for child in range(start, start + pool.child_count[0])
+                    if pool.move[child] == packed
+                ),
+                None,
+            )
+            if child is None:
+                pool.clear()
+            else:
+                self._promote(child)
+                if self._root_player != player or self._root_boards != boards:
+                    # the tree wasn't searching this game's position
+                    pool.clear()
+
+        if not pool.size:
+            self._set_root(boards, player)
+
+        self.start_pondering()
+
+    def reset(self) -> None:
+        self.stop_pondering()
+        self._pool.clear()
+        self._root_boards = []
+        self._tree_full = False
+
+    def start_pondering(self) -> None:
+        if not self.ponder or not self._pool.size or self._ponder_thread is not None:
+            return
+
+        self._stop_pondering.clear()
+        self._ponder_thread = threading.Thread(target=self._ponder, daemon=True)
+        self._ponder_thread.start()
+
+    def stop_pondering(self) -> None:
+        if self._ponder_thread is None:
+            return
+
+        self._stop_pondering.set()
+        self._ponder_thread.join()
+        self._ponder_thread = None
+
+    ### tree management
+    def _set_root(self, boards: BoardsType, player: PlayerNumberType) -> None:
+        self._pool.clear()
+        self._pool.allocate(1)
+        self._root_boards = copy_boards(boards)
+        self._root_player = player
+        self._tree_full = False
+
+    def _promote(self, child: int) -> None:
+        move = unpack_move(self._pool.move[child], self._root_boards)
+        Rules.update_boards(self._root_boards, move, self._root_player)
+        self._root_player = Rules.get_opponent_number(self._root_player)
+        self._pool.keep_subtree(child)
+        self._tree_full = False
+
+    def _play_random_move(self) -> Move:
+        moves = Rules.get_legal_moves(self._root_boards, self._root_player)
+        if not moves:
+            raise GameError(f"no legal moves for player {self._root_player}")
+
+        move = self._rng.choice(moves)
+        boards = copy_boards(self._root_boards)
+        Rules.update_boards(boards, move, self._root_player)
+        self._set_root(boards, Rules.get_opponent_number(self._root_player))
+        self.start_pondering()
+
         return move
 
+    def _ponder(self) -> None:
+        # a full tree stops the search so an idle game can't hold a CPU forever.
+        # visits are capped too, for positions whose lines all end the game
+        pool = self._pool
+        while (
+            not self._stop_pondering.is_set()
+            and not self._tree_full
+            and pool.visits[0] < pool.capacity
+        ):
+            self._iterate(self.batch_size)
+
+    ### search
+    def _iterate(self, batch_size: int) -> None:
+        leaves = []
+        for _ in range(batch_size):
+            path, boards, player = self._select_and_expand()
+            player, score = self._rollout(boards, player)
+            leaves.append((path, boards, player, score))
+
+        # leaves still undecided after the rollout are scored together, so the
+        # evaluator runs once per batch instead of once per leaf
+        pending = [leaf for leaf in leaves if leaf[3] is None]
+        if pending and self.evaluator is not None:
+            scores = self.evaluator.evaluate(
+                [boards for _, boards, _, _ in pending],
+                [player for _, _, player, _ in pending],
+            )
+        else:
+            # unfinished rollouts count as draws without an evaluator
+            scores = [0.5] * len(pending)
+        pending_scores = iter(scores)
+
+        for path, _, player, score in leaves:
+            if score is None:
+                score = float(next(pending_scores))
+            self._backpropagate(path, player, score)
+
+    def _select_and_expand(self) -> Tuple[List[int], BoardsType, PlayerNumberType]:
+        pool = self._pool
+        visits = pool.visits
+        boards = copy_boards(self._root_boards)
+        player = self._root_player
+        node = 0
+        path = [node]
+
+        # visits are counted on the way down, so paths waiting on the rest of
+        # their batch look like losses and the other searches spread out
+        visits[node] += 1
+
+        # selection
+        while pool.first_child[node] != -1:
+            node = self._select_child(node)
+            move = unpack_move(pool.move[node], boards)
+            Rules.update_boards(boards, move, player)
+            player = Rules.get_opponent_number(player)
+            visits[node] += 1
+            path.append(node)
+            if visits[node] == 1:
+                # first visit to this child, so it's the new leaf
+                return path, boards, player
+
+        # expansion: every child is allocated at once, unvisited. the root
+        # takes whatever still fits, so a small budget only limits the depth
+        if not self._tree_full and get_winner(boards) is None:
+            moves = Rules.get_legal_moves(boards, player)
+            count = len(moves)
+            if node == 0:
+                count = min(count, pool.capacity - pool.size)
+            start = pool.allocate(count) if count else -1
+            if count < len(moves) or (moves and start == -1):
+                self._tree_full = True
+            if start != -1:
+                self._rng.shuffle(moves)
+                for offset, move in enumerate(moves[:count]):
+                    pool.move[start + offset] = pack_move(move)
+                pool.first_child[node] = start
+                pool.child_count[node] = count
+
+                node = start
+                Rules.update_boards(boards, moves[0], player)
+                player = Rules.get_opponent_number(player)
+                visits[node] += 1
+                path.append(node)
+
+        return path, boards, player
+
+    def _select_child(self, node: int) -> int:
+        pool = self._pool
+        visits = pool.visits
+        wins = pool.wins
+        start = pool.first_child[node]
+        log_visits = math.log(visits[node])
+
+        best = start
+        best_score = -1.0
+        for child in range(start, start + pool.child_count[node]):
+            child_visits = visits[child]
+            if child_visits == 0:
+                # children are shuffled, so the first unvisited one is random
+                return child
+            score = wins[child] / child_visits + self.exploration * math.sqrt(
+                log_visits / child_visits
+            )
+            if score > best_score:
+                best = child
+                best_score = score
+
+        return best
+
+    def _rollout(
+        self, boards: BoardsType, player: PlayerNumberType
+    ) -> Tuple[PlayerNumberType, Optional[float]]:
+        """
+        play random moves from `boards`. returns the player to move at the end
+        and their chance of winning, or None if the game isn't decided yet
+        """
+        for ply in range(self.rollout_depth + 1):
+            winner = get_winner(boards)
+            if winner is not None:
+                return player, float(winner == player)
+            if ply == self.rollout_depth:
+                break
+
+            moves = Rules.get_legal_moves(boards, player)
+            if not moves:
+                return player, 0.5
+            Rules.update_boards(boards, self._rng.choice(moves), player)
+            player = Rules.get_opponent_number(player)
+
+        return player, None
+
+    def _backpropagate(
+        self, path: List[int], player: PlayerNumberType, score: float
+    ) -> None:
+        wins = self._pool.wins
+        mover = self._root_player
+        for node in path[1:]:
+            if mover == player:
+                wins[node] += score
+            else:
+                wins[node] += 1 - score
+            mover = Rules.get_opponent_number(mover)
+
     @staticmethod
     def get_stones_from_board(
         board: BoardType, player: PlayerNumberType
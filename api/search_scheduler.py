@@ -0,0 +1,175 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Deque, List, Tuple, TYPE_CHECKING
+from game_types import BoardsType, PlayerNumberType
+
+if TYPE_CHECKING:
+    from game import Move
+    from monte_carlo_ai import MonteCarloAI
+
+
+@dataclass
+class SearchJob:
+    ai: "MonteCarloAI"
+    deadline: float
+    future: "Future[Move]"
+    submitted: float
+    iterations: int = 0
+    # how long the last slice took, to finish before a slice would overrun
+    slice_time: float = 0.0
+
+
+@dataclass
+class SchedulerMetrics:
+    queue_depth: int = 0
+    active_searches: int = 0
+    completed: int = 0
+    missed_deadlines: int = 0
+    mean_latency: float = 0.0
+    p95_latency: float = 0.0
+    max_latency: float = 0.0
+
+
+class SearchScheduler:
+    """
+    runs every game's AI search on a fixed pool of worker threads, a few
+    playouts at a time. the queue is ordered by deadline, so a game whose
+    clock is low gets the next slice. a search that reaches its deadline
+    finishes at its next turn in the queue, so under load it can still run
+    late by the wait for a free worker
+    """
+
+    def __init__(
+        self, workers: int = 4, slice_iterations: int = 16, latency_window: int = 1000
+    ) -> None:
+        self.slice_iterations = slice_iterations
+
+        self._queue: List[Tuple[float, int, SearchJob]] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._closed = False
+
+        self._active = 0
+        self._completed = 0
+        self._missed_deadlines = 0
+        self._latencies: Deque[float] = deque(maxlen=latency_window)
+
+        self._threads = [
+            threading.Thread(
+                target=self._work, name=f"search-worker-{index}", daemon=True
+            )
+            for index in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(
+        self,
+        ai: "MonteCarloAI",
+        boards: BoardsType,
+        player: PlayerNumberType,
+        think_time: float,
+    ) -> "Future[Move]":
+        """search for `player`'s move for ai.iterations, or `think_time` seconds"""
+        # the AI isn't shared with a worker until its job is queued
+        ai.begin_search(boards, player)
+
+        now = time.monotonic()
+        job = SearchJob(
+            ai=ai, deadline=now + think_time, future=Future(), submitted=now
+        )
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("scheduler is closed")
+            self._active += 1
+            self._push(job)
+
+        return job.future
+
+    def metrics(self) -> SchedulerMetrics:
+        with self._condition:
+            latencies = sorted(self._latencies)
+            return SchedulerMetrics(
+                queue_depth=len(self._queue),
+                active_searches=self._active,
+                completed=self._completed,
+                missed_deadlines=self._missed_deadlines,
+                mean_latency=sum(latencies) / len(latencies) if latencies else 0.0,
+                p95_latency=(
+                    latencies[int(len(latencies) * 0.95)] if latencies else 0.0
+                ),
+                max_latency=latencies[-1] if latencies else 0.0,
+            )
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            for _, _, job in self._queue:
+                job.future.cancel()
+            self._active -= len(self._queue)
+            self._queue.clear()
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join()
+
+    def _push(self, job: SearchJob) -> None:
+        heapq.heappush(self._queue, (job.deadline, next(self._sequence), job))
+        self._condition.notify()
+
+    def _work(self) -> None:
+        while True:
+            with self._condition:
+                while not self._queue and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                _, _, job = heapq.heappop(self._queue)
+
+            # a popped job belongs to this worker alone until it's pushed back
+            done = self._run_slice(job)
+
+            with self._condition:
+                if done:
+                    self._active -= 1
+                elif self._closed:
+                    job.future.cancel()
+                    self._active -= 1
+                else:
+                    self._push(job)
+
+    def _run_slice(self, job: SearchJob) -> bool:
+        """search one slice of `job`, and finish it if it's out of time"""
+        start = time.monotonic()
+        try:
+            # time spent waiting in the queue counts against the deadline too,
+            # so an overdue search plays what it has without another slice
+            if start < job.deadline or not job.ai.root_expanded:
+                job.ai.search(self.slice_iterations)
+                job.iterations += self.slice_iterations
+                now = time.monotonic()
+                job.slice_time = now - start
+
+                if (
+                    job.iterations < job.ai.iterations
+                    and now + job.slice_time < job.deadline
+                ):
+                    return False
+
+            move = job.ai.finish_search()
+        except Exception as e:
+            job.future.set_exception(e)
+            return True
+
+        now = time.monotonic()
+        with self._condition:
+            self._completed += 1
+            self._latencies.append(now - job.submitted)
+            if now > job.deadline:
+                self._missed_deadlines += 1
+        job.future.set_result(move)
+        return True
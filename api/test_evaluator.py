@@ -0,0 +1,51 @@
+import numpy as np
+
+from game import Game
+from evaluator import Evaluator, encode_features, encode_stones
+from monte_carlo_ai import MonteCarloAI
+
+
+def test_features_are_seen_by_player_to_move():
+    game = Game()
+    stones = encode_stones([game.boards, game.boards])
+
+    features = encode_features(stones, np.array([1, 2]))
+
+    assert np.array_equal(
+        features[0], features[1]
+    ), "Opening position should look the same to both players"
+
+
+def test_save_and_load(tmp_path):
+    game = Game()
+    evaluator = Evaluator.random(hidden_size=8, seed=0)
+    path = str(tmp_path / "weights.npz")
+
+    evaluator.save(path)
+    loaded = Evaluator.load(path)
+
+    assert np.allclose(
+        evaluator.evaluate([game.boards], [1]), loaded.evaluate([game.boards], [1])
+    )
+
+
+def test_search_evaluates_leaves_in_batches():
+    class CountingEvaluator(Evaluator):
+        def __init__(self, *weights):
+            super().__init__(*weights)
+            self.batch_sizes = []
+
+        def evaluate(self, boards_batch, players):
+            self.batch_sizes.append(len(boards_batch))
+            return super().evaluate(boards_batch, players)
+
+    base = Evaluator.random(hidden_size=8, seed=0)
+    evaluator = CountingEvaluator(base.w1, base.b1, base.w2, base.b2)
+    ai = MonteCarloAI(
+        iterations=32, rollout_depth=0, evaluator=evaluator, batch_size=8, seed=0
+    )
+    game = Game()
+
+    game.play_move(ai.generate_move(game.boards, 1))
+
+    assert evaluator.batch_sizes == [8, 8, 8, 8]
@@ -1,3 +1,7 @@
+import os
+import subprocess
+import sys
+
 import pytest
 
 from game import (
@@ -150,3 +154,15 @@ def test_game_winner_check():
     assert (
         game.winner == 1
     ), "Black should be declared winner because board[0] has no white stones."
+
+
+def test_import_does_not_load_numpy():
+    # numpy is only needed to print boards, and slows down cold starts
+    result = subprocess.run(
+        [sys.executable, "-c", "import game, sys; print('numpy' in sys.modules)"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.stdout.strip() == "False"
@@ -0,0 +1,118 @@
+import index
+
+
+def test_human_move_gets_ai_reply():
+    client = index.app.test_client()
+
+    game_id = client.post("/api/games", json={}).get_json()["id"]
+    response = client.post(
+        f"/api/games/{game_id}/moves", json={"move": "a1s1 c1", "clock": 10.0}
+    )
+
+    state = response.get_json()
+    assert response.status_code == 200
+    assert index.MOVE_REGEX.match(state["ai_move"]), "AI should reply in notation"
+    assert state["player_turn"] == 1, "After the AI reply it's black's turn again"
+    assert client.get("/api/scheduler").get_json()["completed"] >= 1
+
+
+def test_illegal_move_is_rejected():
+    client = index.app.test_client()
+
+    game_id = client.post("/api/games", json={}).get_json()["id"]
+    response = client.post(f"/api/games/{game_id}/moves", json={"move": "c1s1 a1"})
+
+    assert response.status_code == 400
+    assert "home boards" in response.get_json()["error"]
+
+
+def test_invalid_clock_leaves_the_game_playable():
+    client = index.app.test_client()
+
+    game_id = client.post("/api/games", json={}).get_json()["id"]
+    response = client.post(
+        f"/api/games/{game_id}/moves", json={"move": "a1s1 c1", "clock": "10"}
+    )
+
+    assert response.status_code == 400
+    assert "clock" in response.get_json()["error"]
+    retry = client.post(
+        f"/api/games/{game_id}/moves", json={"move": "a1s1 c1", "clock": 1.0}
+    )
+    assert retry.status_code == 200, "The rejected move shouldn't have been played"
+
+
+def test_failed_ai_reply_can_be_retried(monkeypatch):
+    client = index.app.test_client()
+    game_id = client.post("/api/games", json={}).get_json()["id"]
+
+    def fail(self):
+        raise RuntimeError("search crashed")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(index.MonteCarloAI, "finish_search", fail)
+        response = client.post(
+            f"/api/games/{game_id}/moves", json={"move": "a1s1 c1", "clock": 1.0}
+        )
+
+    assert response.status_code == 500
+    assert "search crashed" in response.get_json()["error"]
+
+    retry = client.post(f"/api/games/{game_id}/ai-move", json={"clock": 1.0})
+    assert retry.status_code == 200
+    assert retry.get_json()["player_turn"] == 1, "The retried AI reply should be played"
+
+
+def test_finished_game_is_dropped():
+    client = index.app.test_client()
+    game_id = client.post("/api/games", json={}).get_json()["id"]
+    board = [None] * 16
+    board[8], board[12] = 1, 2
+    index.games[game_id].game.boards[1] = board
+
+    response = client.post(f"/api/games/{game_id}/moves", json={"move": "a1s1 b9"})
+
+    assert response.get_json()["winner"] == 1
+    assert game_id not in index.games
+
+
+def test_idle_games_expire(monkeypatch):
+    client = index.app.test_client()
+    idle_id = client.post("/api/games", json={}).get_json()["id"]
+
+    monkeypatch.setattr(index, "GAME_TIMEOUT", -1)
+    client.post("/api/games", json={})
+
+    assert idle_id not in index.games
+
+
+def test_out_of_range_square_is_rejected():
+    client = index.app.test_client()
+    game_id = client.post("/api/games", json={}).get_json()["id"]
+
+    for move in ("a17s1 c1", "a0s1 c1"):
+        response = client.post(f"/api/games/{game_id}/moves", json={"move": move})
+
+        assert response.status_code == 400
+        assert "error" in response.get_json()
+
+
+def test_non_object_body_is_rejected():
+    client = index.app.test_client()
+    game_id = client.post("/api/games", json={}).get_json()["id"]
+
+    for url in ("/api/games", f"/api/games/{game_id}/moves"):
+        response = client.post(url, json=["a1s1 c1"])
+
+        assert response.status_code == 400
+        assert "JSON object" in response.get_json()["error"]
+
+
+def test_metrics_dont_start_the_scheduler(monkeypatch):
+    monkeypatch.setattr(index, "_scheduler", None)
+    client = index.app.test_client()
+
+    metrics = client.get("/api/scheduler").get_json()
+
+    assert index._scheduler is None, "Reading metrics shouldn't start workers"
+    assert metrics["completed"] == 0 and metrics["active_searches"] == 0
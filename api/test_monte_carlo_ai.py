@@ -0,0 +1,117 @@
+from game import Game, Rules
+from monte_carlo_ai import MonteCarloAI, NodePool, pack_move, unpack_move
+
+
+def test_legal_moves_from_start():
+    game = Game()
+
+    moves = Rules.get_legal_moves(game.boards, 1)
+
+    assert len(moves) == 232, "Opening position should have 232 legal moves"
+    for move in moves:
+        is_legal, reason = Rules.is_move_legal(move, game.boards, 1)
+        assert is_legal, reason
+
+
+def test_generate_move_is_legal():
+    game = Game()
+    ai = MonteCarloAI(iterations=20, rollout_depth=5, seed=0)
+
+    move = ai.generate_move(game.boards, 1)
+    game.play_move(move)
+
+    assert game.player_turn == 2, "AI move should have been accepted"
+
+
+def test_visit_ties_go_to_the_better_move():
+    game = Game()
+    ai = MonteCarloAI(iterations=50, rollout_depth=0, seed=1)
+    ai.begin_search(game.boards, 1)
+    ai.search(50)
+
+    # every visited root child has one visit and a drawn score
+    pool = ai._pool
+    winner = pool.first_child[0] + 40
+    assert pool.visits[winner] == 1
+    pool.wins[winner] = 1.0
+    expected = pack_move(unpack_move(pool.move[winner], game.boards))
+
+    assert pack_move(ai.finish_search()) == expected
+
+
+def test_pack_move_round_trip():
+    game = Game()
+
+    for move in Rules.get_legal_moves(game.boards, 1):
+        assert unpack_move(pack_move(move), game.boards) == move
+
+
+def test_keep_subtree_frees_other_nodes():
+    pool = NodePool(16)
+    root = pool.allocate(1)
+    children = pool.allocate(3)
+    pool.first_child[root], pool.child_count[root] = children, 3
+    pool.allocate(2)  # children of node 1, dropped with it
+    grandchildren = pool.allocate(2)
+    pool.first_child[children + 1], pool.child_count[children + 1] = grandchildren, 2
+    pool.move[grandchildren + 1] = 42
+    pool.visits[grandchildren + 1] = 7
+
+    pool.keep_subtree(children + 1)
+
+    assert pool.size == 3, "Only the kept node and its children should remain"
+    assert pool.first_child[0] == 1
+    assert pool.move[2] == 42 and pool.visits[2] == 7
+
+
+def test_opponent_move_promotes_subtree():
+    ai = MonteCarloAI(iterations=300, rollout_depth=2, seed=0)
+    game = Game(ai=ai)
+
+    game.play_move(ai.generate_move(game.boards, 1))
+    # search the opponent's replies, as pondering would
+    for _ in range(300):
+        ai._iterate(1)
+
+    pool = ai._pool
+    start = pool.first_child[0]
+    reply = max(
+        range(start, start + pool.child_count[0]), key=lambda child: pool.visits[child]
+    )
+    reply_visits = pool.visits[reply]
+    subtree_size = 0
+    stack = [reply]
+    while stack:
+        node = stack.pop()
+        subtree_size += 1
+        if pool.first_child[node] != -1:
+            start = pool.first_child[node]
+            stack.extend(range(start, start + pool.child_count[node]))
+
+    game.play_move(unpack_move(pool.move[reply], game.boards))
+
+    assert ai.root_visits == reply_visits, "Reply subtree should become the new root"
+    assert ai.node_count == subtree_size, "Sibling subtrees should be freed"
+
+
+def test_pondering_respects_node_cap():
+    # fewer nodes than the 232 opening moves
+    ai = MonteCarloAI(iterations=10, max_nodes=40, rollout_depth=2, ponder=True)
+    game = Game(ai=ai)
+
+    move = ai.generate_move(game.boards, 1)
+    game.play_move(move)
+    ai._ponder_thread.join(timeout=30)  # type: ignore
+
+    assert game.player_turn == 2, "AI move should have been accepted"
+    assert ai.node_count == 40, "Pondering should stop once the tree is full"
+    ai.stop_pondering()
+
+
+def test_unexpanded_root_still_plays_a_legal_move():
+    game = Game()
+    ai = MonteCarloAI(iterations=10, max_nodes=1, rollout_depth=2, seed=0)
+
+    game.play_move(ai.generate_move(game.boards, 1))
+
+    assert game.player_turn == 2, "AI move should have been accepted"
@@ -0,0 +1,88 @@
+from game import Game, Rules
+from monte_carlo_ai import MonteCarloAI, pack_move
+from search_scheduler import SearchScheduler
+
+
+def test_every_game_gets_a_legal_move():
+    scheduler = SearchScheduler(workers=2, slice_iterations=4)
+    games = [Game() for _ in range(6)]
+    futures = [
+        scheduler.submit(
+            MonteCarloAI(iterations=16, rollout_depth=1, seed=index),
+            game.boards,
+            1,
+            think_time=5.0,
+        )
+        for index, game in enumerate(games)
+    ]
+
+    legal = {pack_move(move) for move in Rules.get_legal_moves(Game().boards, 1)}
+    for game, future in zip(games, futures):
+        move = future.result(timeout=30)
+        assert pack_move(move) in legal
+        game.play_move(move)
+
+    metrics = scheduler.metrics()
+    assert metrics.completed == 6
+    assert metrics.queue_depth == 0 and metrics.active_searches == 0
+    scheduler.close()
+
+
+def test_low_clock_is_served_first():
+    scheduler = SearchScheduler(workers=1, slice_iterations=4)
+    boards = Game().boards
+    finished = []
+
+    relaxed = scheduler.submit(
+        MonteCarloAI(iterations=400, rollout_depth=1), boards, 1, think_time=60.0
+    )
+    urgent = scheduler.submit(
+        MonteCarloAI(iterations=400, rollout_depth=1), boards, 1, think_time=0.5
+    )
+    relaxed.add_done_callback(lambda _: finished.append("relaxed"))
+    urgent.add_done_callback(lambda _: finished.append("urgent"))
+
+    urgent.result(timeout=30)
+    relaxed.result(timeout=60)
+
+    assert finished == ["urgent", "relaxed"]
+    scheduler.close()
+
+
+def test_overdue_search_finishes_without_another_slice():
+    class CountingAI(MonteCarloAI):
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            self.searches = 0
+
+        def search(self, iterations):
+            self.searches += 1
+            super().search(iterations)
+
+    scheduler = SearchScheduler(workers=1, slice_iterations=4)
+    boards = Game().boards
+    ai = CountingAI(iterations=400, rollout_depth=1)
+    ai.begin_search(boards, 1)
+    ai.search(4)
+
+    future = scheduler.submit(ai, boards, 1, think_time=0.0)
+    future.result(timeout=30)
+
+    assert ai.searches == 1, "An expanded root past its deadline should just play"
+    scheduler.close()
+
+
+def test_cancelled_searches_are_not_active():
+    scheduler = SearchScheduler(workers=1, slice_iterations=4)
+    boards = Game().boards
+    futures = [
+        scheduler.submit(
+            MonteCarloAI(iterations=400, rollout_depth=1), boards, 1, think_time=60.0
+        )
+        for _ in range(3)
+    ]
+
+    scheduler.close()
+
+    assert all(future.cancelled() for future in futures)
+    assert scheduler.metrics().active_searches == 0
@@ -0,0 +1,139 @@
+"""
+offline training for the position evaluator.
+
+    python train_evaluator.py selfplay --games 200 --out records.npz
+    python train_evaluator.py train --records records.npz --out weights.npz
+
+self-play games are played by MonteCarloAI (using an earlier evaluator with
+--weights, to bootstrap). every position is labelled with the game result
+for the player to move.
+"""
+
+import argparse
+import numpy as np
+from typing import List, Optional, Tuple
+from game import Game, GameError
+from game_types import BoardsType, PlayerNumberType
+from evaluator import Evaluator, encode_features, encode_stones
+from monte_carlo_ai import MonteCarloAI, copy_boards
+
+
+def play_selfplay_game(
+    ai: MonteCarloAI, max_plies: int
+) -> Tuple[List[BoardsType], List[PlayerNumberType], Optional[PlayerNumberType]]:
+    game = Game()
+    positions: List[BoardsType] = []
+    players: List[PlayerNumberType] = []
+
+    for _ in range(max_plies):
+        positions.append(copy_boards(game.boards))
+        players.append(game.player_turn)
+        try:
+            game.play_move(ai.generate_move(game.boards, game.player_turn))
+        except GameError:
+            break
+        if game.winner is not None:
+            break
+
+    ai.reset()
+    return positions, players, game.winner
+
+
+def selfplay(args: argparse.Namespace) -> None:
+    evaluator = Evaluator.load(args.weights) if args.weights else None
+    ai = MonteCarloAI(
+        iterations=args.iterations,
+        rollout_depth=args.rollout_depth,
+        evaluator=evaluator,
+        seed=args.seed,
+    )
+
+    stones, players, outcomes = [], [], []
+    for index in range(args.games):
+        positions, game_players, winner = play_selfplay_game(ai, args.max_plies)
+        stones.append(encode_stones(positions))
+        players.extend(game_players)
+        outcomes.extend(
+            0.5 if winner is None else float(winner == player)
+            for player in game_players
+        )
+        print(f"game {index + 1}/{args.games}: {len(positions)} plies, winner {winner}")
+
+    np.savez_compressed(
+        args.out,
+        stones=np.concatenate(stones),
+        players=np.array(players, dtype=np.int8),
+        outcomes=np.array(outcomes, dtype=np.float32),
+    )
+
+
+def train(args: argparse.Namespace) -> None:
+    with np.load(args.records) as records:
+        features = encode_features(records["stones"], records["players"])
+        outcomes = records["outcomes"]
+
+    rng = np.random.default_rng(args.seed)
+    model = (
+        Evaluator.load(args.weights)
+        if args.weights
+        else Evaluator.random(args.hidden_size, args.seed)
+    )
+
+    for epoch in range(args.epochs):
+        order = rng.permutation(len(features))
+        total_loss = 0.0
+        for start in range(0, len(order), args.batch_size):
+            batch = order[start : start + args.batch_size]
+            x, y = features[batch], outcomes[batch]
+
+            hidden = np.maximum(x @ model.w1 + model.b1, 0)
+            predictions = 1 / (1 + np.exp(-(hidden @ model.w2 + model.b2)))
+            total_loss += -np.sum(
+                y * np.log(predictions + 1e-7)
+                + (1 - y) * np.log(1 - predictions + 1e-7)
+            )
+
+            # cross-entropy gradient through the sigmoid is just the error
+            d_logits = (predictions - y) / len(batch)
+            d_hidden = np.outer(d_logits, model.w2) * (hidden > 0)
+            model.w2 -= args.learning_rate * (hidden.T @ d_logits)
+            model.b2 -= args.learning_rate * d_logits.sum(keepdims=True)
+            model.w1 -= args.learning_rate * (x.T @ d_hidden)
+            model.b1 -= args.learning_rate * d_hidden.sum(axis=0)
+
+        print(f"epoch {epoch + 1}/{args.epochs}: loss {total_loss / len(order):.4f}")
+
+    model.save(args.out)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    selfplay_parser = commands.add_parser("selfplay", help="record self-play games")
+    selfplay_parser.add_argument("--games", type=int, default=100)
+    selfplay_parser.add_argument("--iterations", type=int, default=50)
+    selfplay_parser.add_argument("--rollout-depth", type=int, default=10)
+    selfplay_parser.add_argument("--max-plies", type=int, default=200)
+    selfplay_parser.add_argument("--weights", help="evaluator used by the players")
+    selfplay_parser.add_argument("--seed", type=int)
+    selfplay_parser.add_argument("--out", default="records.npz")
+    selfplay_parser.set_defaults(run=selfplay)
+
+    train_parser = commands.add_parser("train", help="fit the evaluator to records")
+    train_parser.add_argument("--records", default="records.npz")
+    train_parser.add_argument("--weights", help="continue training these weights")
+    train_parser.add_argument("--hidden-size", type=int, default=32)
+    train_parser.add_argument("--epochs", type=int, default=20)
+    train_parser.add_argument("--batch-size", type=int, default=256)
+    train_parser.add_argument("--learning-rate", type=float, default=0.1)
+    train_parser.add_argument("--seed", type=int)
+    train_parser.add_argument("--out", default="weights.npz")
+    train_parser.set_defaults(run=train)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()